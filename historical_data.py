@@ -1,10 +1,17 @@
+import hashlib
+import io
+import os
+import tempfile
+from pathlib import Path
 import streamlit as st
+import numpy as np
 import pandas as pd
-import geopandas as gpd
+import pyarrow as pa
 import folium
+from folium.plugins import FastMarkerCluster
 from streamlit_folium import folium_static
 import plotly.express as px
-from datetime import datetime
+from datetime import datetime, time
 
 # Set page configuration
 st.set_page_config(page_title="My Streamlit App", page_icon="🌍")
@@ -27,121 +34,255 @@ st.write("This app is trying to be embedded in an iframe.")
 # Increase server max message size
 st._config.set_option("server.maxMessageSize", 500)
 
+TRAFFIC_KEYWORDS = ['traffic_volume', 'volume', 'traffic', 'count']
+DATETIME_KEYWORDS = ['datetime', 'date_time', 'timestamp', 'date']
+TRAFFIC_PATTERN = '|'.join(TRAFFIC_KEYWORDS)
+DATETIME_PATTERN = '|'.join(DATETIME_KEYWORDS)
+
 # Automatically detect a column related to traffic volume
 def detect_traffic_volume_columns(data):
-    keywords = ['traffic_volume', 'volume', 'traffic', 'count']
-    return [col for col in data.columns if any(keyword in col.lower() for keyword in keywords)]
+    mask = data.columns.str.lower().str.contains(TRAFFIC_PATTERN, regex=True)
+    return data.columns[mask].tolist()
 
 # Detect the datetime column in the dataset
 def detect_datetime_column(data):
-    keywords = ['datetime', 'date_time', 'timestamp', 'date']
-    for col in data.columns:
-        if any(keyword in col.lower() for keyword in keywords):
-            return col
-    return None
-
-# Preprocess the data
-def preprocess_data(uploaded_file):
+    mask = data.columns.str.lower().str.contains(DATETIME_PATTERN, regex=True)
+    return data.columns[mask.argmax()] if mask.any() else None
+
+# Read a CSV or Parquet file into Arrow-backed columns using pyarrow; every
+# column is kept since the chart selectors offer all of them
+def read_file(file_bytes, file_name):
+    if file_name.lower().endswith('.parquet'):
+        return pd.read_parquet(io.BytesIO(file_bytes), engine='pyarrow', dtype_backend='pyarrow')
+    return pd.read_csv(io.BytesIO(file_bytes), engine='pyarrow', dtype_backend='pyarrow')
+
+# Shrink the columns every filter and chart scans: float32 numbers, categorical labels
+def downcast_columns(data):
+    for col in ['latitude', 'longitude']:
+        if col in data.columns:
+            data[col] = pd.to_numeric(data[col], errors='coerce', downcast='float')
+    for col in ['region_name', 'area_name', 'city']:
+        if col in data.columns:
+            data[col] = data[col].astype('category')
+    for col in detect_traffic_volume_columns(data):
+        if pd.api.types.is_integer_dtype(data[col]):
+            data[col] = pd.to_numeric(data[col], downcast='integer')
+        elif pd.api.types.is_float_dtype(data[col]):
+            data[col] = pd.to_numeric(data[col], downcast='float')
+    return data
+
+# Parse and normalize the raw file contents
+def parse_data(file_bytes, file_name):
     try:
         # Read the file as a DataFrame
-        data = pd.read_csv(uploaded_file)
+        data = read_file(file_bytes, file_name)
     except Exception as e:
         st.error(f"Error reading the file: {e}")
         return None
     
-    data.columns = map(str.lower, data.columns)
+    data = data.rename(columns=str.lower, copy=False)
     datetime_col = detect_datetime_column(data)
     if datetime_col:
         data[datetime_col] = pd.to_datetime(data[datetime_col], errors='coerce')
-        data = data.dropna(subset=[datetime_col])
+        # pyarrow may already have parsed the column; keep it as a NumPy datetime,
+        # preserving the timezone of tz-aware timestamps (e.g. UTC from pandas)
+        if isinstance(data[datetime_col].dtype, pd.ArrowDtype):
+            tz = getattr(data[datetime_col].dtype.pyarrow_dtype, 'tz', None)
+            data[datetime_col] = data[datetime_col].astype(pd.DatetimeTZDtype('ns', tz) if tz else 'datetime64[ns]')
         if not pd.api.types.is_datetime64_any_dtype(data[datetime_col]):
             st.warning(f"'{datetime_col}' could not be converted to datetime. Ensure the values are in a valid format.")
             return None
         data.rename(columns={datetime_col: 'datetime'}, inplace=True)
-        return data
+        # Converted once here; nothing downstream should re-parse it
+        assert pd.api.types.is_datetime64_ns_dtype(data['datetime'])
+        # Drop unparseable rows and put the rest in time order (so date filtering can
+        # binary search) with a single take, copying the frame only once
+        dt = data['datetime'].values
+        rows = np.flatnonzero(data['datetime'].notna().to_numpy())
+        rows = rows[np.argsort(dt[rows], kind='stable')]
+        data = data.take(rows)
+        data.index = pd.RangeIndex(len(data))
+        return downcast_columns(data)
     else:
         st.warning("The data must contain a column with datetime information (e.g., 'datetime', 'Date_Time', 'timestamp').")
         return None
 
+# Processed uploads are kept here as Parquet so restarts and other sessions skip parsing
+CACHE_DIR = Path(tempfile.gettempdir()) / "hdcache"
+# Salted into the file digest; bump whenever parse_data or downcast_columns change
+# what gets cached, so frames written by older code are no longer found
+CACHE_VERSION = b"hdcache-v1"
+# Errors from writing or reading a cache file; any of them just means a cache miss
+CACHE_ERRORS = (OSError, ValueError, pa.ArrowException)
+# Most recently used cache files to keep; older ones (including stale versions) are pruned
+MAX_CACHE_FILES = 10
+# Leftover temp files from interrupted writes are removed after this many seconds
+STALE_TMP_SECONDS = 3600
+
+# Drop the least recently used cache files beyond MAX_CACHE_FILES and any abandoned temp files
+def prune_parquet_cache():
+    try:
+        cached = sorted(CACHE_DIR.glob("*.parquet"), key=lambda path: path.stat().st_mtime, reverse=True)
+        for path in cached[MAX_CACHE_FILES:]:
+            path.unlink(missing_ok=True)
+        for path in CACHE_DIR.glob("*.tmp"):
+            if datetime.now().timestamp() - path.stat().st_mtime > STALE_TMP_SECONDS:
+                path.unlink(missing_ok=True)
+    except OSError:
+        pass
+
+# Write the processed data to the on-disk cache; a failed write only costs the next load.
+# The temp file name is unique so concurrent sessions never write into the same file
+def write_parquet_cache(data, cache_path):
+    tmp_path = None
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=cache_path.parent, suffix=".tmp")
+        os.close(fd)
+        tmp_path = Path(tmp_name)
+        data.to_parquet(tmp_path, engine='pyarrow', compression='zstd', row_group_size=100_000)
+        os.replace(tmp_path, cache_path)
+    except CACHE_ERRORS:
+        if tmp_path is not None:
+            tmp_path.unlink(missing_ok=True)
+    prune_parquet_cache()
+
+# Read a cached frame, marking it recently used; None if it's missing, was just
+# pruned, or isn't a readable Parquet file (the directory is shared)
+def read_parquet_cache(cache_path):
+    try:
+        data = pd.read_parquet(cache_path, engine='pyarrow', memory_map=True)
+        os.utime(cache_path)
+    except CACHE_ERRORS:
+        return None
+    return data
+
+# Load the processed data, memoized on the bytes so the same file is only
+# parsed once regardless of how or by whom it was uploaded
+@st.cache_data(show_spinner="Parsing file…", max_entries=3)
+def load_data(file_bytes, file_name):
+    digest = hashlib.blake2b(file_bytes, digest_size=16, person=CACHE_VERSION).hexdigest()
+    cache_path = CACHE_DIR / f"{digest}.parquet"
+    data = read_parquet_cache(cache_path)
+    if data is None:
+        data = parse_data(file_bytes, file_name)
+        if data is None:
+            return None
+        write_parquet_cache(data, cache_path)
+
+    # Tag the frame with its source file; slices keep it, and chart caches key on it
+    data.attrs['digest'] = digest
+    return data
 
-# Generate time options in HH:MM:SS format
-def generate_time_options():
-    return [f"{hour:02d}:{minute:02d}:00" for hour in range(24) for minute in range(0, 60, 5)]
+# Preprocess the data, keyed cheaply on the upload so reruns don't rehash the file
+@st.cache_data(
+    max_entries=3,
+    hash_funcs={"streamlit.runtime.uploaded_file_manager.UploadedFile": lambda f: (f.file_id, f.name, f.size)}
+)
+def preprocess_data(uploaded_file):
+    return load_data(uploaded_file.getvalue(), uploaded_file.name)
+
+
+# Select rows between start and end (inclusive); the data must be sorted by datetime
+def filter_by_datetime(data, start_datetime, end_datetime):
+    dt = data['datetime'].values
+    lo = np.searchsorted(dt, np.datetime64(start_datetime), side='left')
+    hi = np.searchsorted(dt, np.datetime64(end_datetime), side='right')
+    return data.iloc[lo:hi]
+
+# Above this many points the map clusters markers client-side instead of drawing each one
+FAST_CLUSTER_THRESHOLD = 1000
+
+# Add markers in chunks so large maps don't block the page while loading
+MARKER_CLUSTER_OPTIONS = {"chunkedLoading": True}
+
+# Plain markers with the same sticky tooltip as the GeoJson layer; each row is [lat, lon, tooltip]
+CLUSTER_MARKER_CALLBACK = """
+function (row) {
+    var marker = L.marker(new L.LatLng(row[0], row[1]));
+    marker.bindTooltip(row[2], {sticky: true});
+    return marker;
+}
+"""
+
+# Column values as text for the map tooltip, 'N/A' where missing
+def tooltip_field(data, col):
+    if col not in data.columns:
+        return 'N/A'
+    values = data[col]
+    return values.astype(str).where(values.notna(), 'N/A')
+
+# Build every point's tooltip HTML in one vectorized pass
+def build_tooltips(data):
+    return (
+        'Region ID: ' + tooltip_field(data, 'region_id') +
+        '<br>Region: ' + tooltip_field(data, 'region_name') +
+        '<br>Road ID: ' + tooltip_field(data, 'area_name') +
+        '<br>City: ' + tooltip_field(data, 'city') +
+        '<br>Latitude: ' + data['latitude'].astype(str) +
+        '<br>Longitude: ' + data['longitude'].astype(str)
+    )
 
 # Folium Map Visualization
 def plot_folium_map_with_geojson(filtered_data):
     if 'longitude' in filtered_data.columns and 'latitude' in filtered_data.columns:
         st.subheader("Filtered Geographical Data Map (Folium)")
 
-        # Convert lat/long to numeric and clean data
-        filtered_data['latitude'] = pd.to_numeric(filtered_data['latitude'], errors='coerce')
-        filtered_data['longitude'] = pd.to_numeric(filtered_data['longitude'], errors='coerce')
-        filtered_data = filtered_data.dropna(subset=['latitude', 'longitude'])
-        filtered_data = filtered_data[
-            (filtered_data['latitude'].between(-90, 90)) & 
-            (filtered_data['longitude'].between(-180, 180))
-        ]
+        # Lat/long are already numeric from downcast_columns; keep valid coordinates
+        # with one fused mask and a single copy (NaN fails every comparison)
+        lat = filtered_data['latitude'].to_numpy(dtype='float32', na_value=np.nan)
+        lon = filtered_data['longitude'].to_numpy(dtype='float32', na_value=np.nan)
+        valid = (lat >= -90) & (lat <= 90) & (lon >= -180) & (lon <= 180)
+        filtered_data = filtered_data[valid]
 
         if filtered_data.empty:
             st.error("No valid geographical data to display. Ensure latitude and longitude values are correct.")
             return
 
-        # Create GeoDataFrame
-        gdf = gpd.GeoDataFrame(
-            filtered_data,
-            geometry=gpd.points_from_xy(filtered_data['longitude'], filtered_data['latitude'])
-        )
-
         # Map styles
         map_styles = {
             "Humanitarian OSM": "https://{s}.tile.openstreetmap.fr/hot/{z}/{x}/{y}.png",
             "CartoDB Positron": "https://{s}.basemaps.cartocdn.com/light_all/{z}/{x}/{y}{r}.png",
             "CartoDB DarkMatter": "https://{s}.basemaps.cartocdn.com/dark_all/{z}/{x}/{y}{r}.png",
         }
-        map_style = st.sidebar.selectbox("Select Map Style", options=list(map_styles.keys()), index=0)
+        map_style = st.sidebar.selectbox("Select Map Style", options=list(map_styles.keys()), key="map_style")
         tiles_url = map_styles[map_style]
 
         # Create map
         m = folium.Map(
-            location=[gdf['latitude'].mean(), gdf['longitude'].mean()],
+            location=[filtered_data['latitude'].mean(), filtered_data['longitude'].mean()],
             zoom_start=10,
             tiles=tiles_url,
             attr=f"{map_style} - Map Tiles"
         )
 
-        # Add GeoJson for full styling control
-        for _, row in gdf.iterrows():
-            geojson_data = {
-                "type": "Feature",
-                "geometry": {
-                    "type": "Point",
-                    "coordinates": [row['longitude'], row['latitude']]
-                },
-                "properties": {
-                    "tooltip": (
-                        f"Region ID: {row.get('region_id', 'N/A')}<br>"
-                        f"Region: {row.get('region_name', 'N/A')}<br>"
-                        f"Road ID: {row.get('area_name', 'N/A')}<br>"
-                        f"City: {row.get('city', 'N/A')}<br>"
-                        f"Latitude: {row['latitude']}<br>"
-                        f"Longitude: {row['longitude']}"
-                    )
-                }
+        tooltips = build_tooltips(filtered_data)
+        if len(filtered_data) > FAST_CLUSTER_THRESHOLD:
+            # Too many points to draw individually; let the browser cluster them
+            FastMarkerCluster(
+                data=list(zip(filtered_data['latitude'].tolist(), filtered_data['longitude'].tolist(), tooltips.tolist())),
+                callback=CLUSTER_MARKER_CALLBACK,
+                options=MARKER_CLUSTER_OPTIONS
+            ).add_to(m)
+        else:
+            # Add all points as one GeoJson layer for full styling control
+            feature_collection = {
+                "type": "FeatureCollection",
+                "features": [
+                    {
+                        "type": "Feature",
+                        "geometry": {
+                            "type": "Point",
+                            "coordinates": [lon, lat]
+                        },
+                        "properties": {"tooltip": tooltip}
+                    }
+                    for lon, lat, tooltip in zip(filtered_data['longitude'].tolist(), filtered_data['latitude'].tolist(), tooltips.tolist())
+                ]
             }
 
-            # Tooltip content only
-            tooltip_content = (
-                f"Region ID: {row.get('region_id', 'N/A')}<br>"
-                f"Region: {row.get('region_name', 'N/A')}<br>"
-                f"Road ID: {row.get('area_name', 'N/A')}<br>"
-                f"City: {row.get('city', 'N/A')}<br>"
-                f"Latitude: {row['latitude']}<br>"
-                f"Longitude: {row['longitude']}"
-            )
-
-            # Add the point using GeoJson with styling
             folium.GeoJson(
-                geojson_data,
+                feature_collection,
                 style_function=lambda x: {
                     "fillColor": "#0000ff",
                     "color": "#0000ff",
@@ -149,70 +290,200 @@ def plot_folium_map_with_geojson(filtered_data):
                     "opacity": 0.5,
                     "radius": 8
                 },
-                tooltip=folium.Tooltip(tooltip_content, sticky=True)  # Tooltip only
+                tooltip=folium.GeoJsonTooltip(fields=["tooltip"], labels=False, sticky=True)
             ).add_to(m)
 
         folium_static(m)
     else:
         st.warning("Longitude and Latitude columns are missing.")
         
+# Cheap cache key for a datetime-sorted frame, so reruns don't hash every cell.
+# The source file's digest keeps different uploads (and users) from sharing figures
+def hash_sorted_frame(data):
+    digest = data.attrs.get('digest')
+    if data.empty:
+        return (digest, tuple(data.columns), 0)
+    return (digest, tuple(data.columns), len(data), data['datetime'].iloc[0], data['datetime'].iloc[-1])
+
+FRAME_HASH_FUNCS = {pd.DataFrame: hash_sorted_frame}
+
+# Above this many rows the 3D scatter plots a sample instead of every point
+MAX_SCATTER_3D_POINTS = 20000
+
+# Chart builders are cached on the data and columns only; colors and sizes are
+# applied to the returned figure so cosmetic changes don't rebuild it
+@st.cache_data(max_entries=10, hash_funcs=FRAME_HASH_FUNCS)
+def build_histogram(data, column, barmode):
+    return px.histogram(data, x=column, barmode=barmode)
+
+@st.cache_data(max_entries=10, hash_funcs=FRAME_HASH_FUNCS)
+def build_scatter(data, x, y):
+    return px.scatter(data, x=x, y=y, render_mode='webgl')
+
+@st.cache_data(max_entries=10, hash_funcs=FRAME_HASH_FUNCS)
+def build_line(data, x, y):
+    return px.line(data, x=x, y=y)
+
+@st.cache_data(max_entries=10, hash_funcs=FRAME_HASH_FUNCS)
+def build_bar(data, x, y):
+    return px.bar(data, x=x, y=y)
+
+@st.cache_data(max_entries=10, hash_funcs=FRAME_HASH_FUNCS)
+def build_scatter_3d(data, column):
+    # Draw a fixed random sample of large datasets so the browser stays responsive
+    if len(data) > MAX_SCATTER_3D_POINTS:
+        data = data.sample(MAX_SCATTER_3D_POINTS, random_state=0)
+
+    fig_3d = px.scatter_3d(
+        data,
+        x=column,  # Use the detected traffic column for X-axis
+        y='datetime',  # Use datetime column for Y-axis
+        z='region_id'  # Region or other categorical data for Z-axis
+    )
+
+    # Update layout to ensure better datetime formatting
+    fig_3d.update_layout(
+        scene=dict(
+            yaxis=dict(
+                title="Datetime",
+                tickformat="%b %Y",  # Display in "Month Year" format
+            )
+        )
+    )
+    return fig_3d
+
+# Each chart is a fragment, so changing one chart's column selectors
+# reruns only that chart rather than the whole dashboard
+@st.fragment
+def show_histogram(data, columns, color, barmode):
+    column_to_plot = st.selectbox("Select Column for Histogram", options=columns, key="histogram")
+    fig_hist = build_histogram(data, column_to_plot, barmode)
+    fig_hist.update_traces(marker_color=color)
+    st.plotly_chart(fig_hist)
+
+@st.fragment
+def show_scatter(data, columns, color, size):
+    x_scatter = st.selectbox("Select X-axis", options=columns, key="scatter_x")
+    y_scatter = st.selectbox("Select Y-axis", options=columns, key="scatter_y")
+    fig_scatter = build_scatter(data, x_scatter, y_scatter)
+    fig_scatter.update_traces(marker=dict(color=color, size=size))
+    st.plotly_chart(fig_scatter)
+
+@st.fragment
+def show_line(data, columns, color):
+    x_lineplot = st.selectbox("Select X-axis", options=columns, key="lineplot_x")
+    y_lineplot = st.selectbox("Select Y-axis", options=columns, key="lineplot_y")
+    fig_line = build_line(data, x_lineplot, y_lineplot)
+    fig_line.update_traces(line_color=color)
+    st.plotly_chart(fig_line)
+
+@st.fragment
+def show_bar(data, columns, color, orientation):
+    column_bar = st.selectbox("Select Column for Bar Chart", options=columns, key="bar")
+    fig_bar = build_bar(
+        data,
+        column_bar if orientation == 'vertical' else columns[1],
+        columns[1] if orientation == 'vertical' else column_bar
+    )
+    fig_bar.update_traces(marker_color=color)
+    st.plotly_chart(fig_bar)
+
+@st.fragment
+def show_scatter_3d(data, color):
+    # Detect traffic-related columns
+    traffic_volume_columns = detect_traffic_volume_columns(data)
+
+    if not traffic_volume_columns:
+        st.error("No suitable columns found for traffic volume. Please ensure the dataset includes relevant columns.")
+    else:
+        st.write(f"Detected traffic volume columns: {', '.join(traffic_volume_columns)}")
+
+    for col in traffic_volume_columns:
+        # Generate 3D scatter plot
+        fig_3d = build_scatter_3d(data, col)
+        fig_3d.update_traces(marker_color=color)
+
+        # Display the plot
+        st.plotly_chart(fig_3d)
+
+# Widgets skipped while the date range is empty: the map style and the chart selectors
+UNRENDERED_WIDGET_KEYS = ["map_style", "histogram", "scatter_x", "scatter_y", "lineplot_x", "lineplot_y", "bar"]
+
+# Streamlit drops the state of widgets that aren't rendered in a run; reassigning
+# their session_state entries keeps the user's choices for when they return
+def keep_unrendered_widget_state():
+    for key in UNRENDERED_WIDGET_KEYS:
+        if key in st.session_state:
+            st.session_state[key] = st.session_state[key]
+
 # Dashboard function
 def historical_data():
     st.title("Advanced Dashboard with Map and Visualizations")
 
-    uploaded_file = st.file_uploader("Upload a CSV file", type=["csv"])
+    uploaded_file = st.file_uploader("Upload a CSV or Parquet file", type=["csv", "parquet"])
 
     if uploaded_file is not None:
         if uploaded_file.size > 300 * 1024 * 1024:
             st.error("File size exceeds 300MB. Please upload a smaller file.")
             return
 
-        processed_data = preprocess_data(uploaded_file)
+        # Reuse this session's DataFrame instead of copying it out of the cache on every rerun
+        file_key = (uploaded_file.file_id, uploaded_file.name, uploaded_file.size)
+        if st.session_state.get('processed_key') == file_key:
+            processed_data = st.session_state['processed_data']
+        else:
+            processed_data = preprocess_data(uploaded_file)
+            if processed_data is not None:
+                st.session_state['processed_data'] = processed_data
+                st.session_state['processed_key'] = file_key
 
         if processed_data is not None and not processed_data.empty:
             st.sidebar.title("Map Customization")
 
             st.subheader("Filter Data by Date and Time")
-            datetime_min = processed_data['datetime'].min()
-            datetime_max = processed_data['datetime'].max()
-
-            years = sorted(processed_data['datetime'].dt.year.unique())
-            months = list(range(1, 13))
-            days = list(range(1, 32))
-            times = generate_time_options()
-
-            st.write("### Select Start Datetime")
-            start_year = st.selectbox("Year", years, index=0, key="start_year")
-            start_month = st.selectbox("Month", months, index=0, key="start_month")
-            start_day = st.selectbox("Day", days, index=0, key="start_day")
-            start_time = st.selectbox("Time (HH:MM:SS)", times, index=0, key="start_time")
-
-            st.write("### Select End Datetime")
-            end_year = st.selectbox("Year", years, index=len(years) - 1, key="end_year")
-            end_month = st.selectbox("Month", months, index=len(months) - 1, key="end_month")
-            end_day = st.selectbox("Day", days, index=len(days) - 1, key="end_day")
-            end_time = st.selectbox("Time (HH:MM:SS)", times, index=len(times) - 1, key="end_time")
-
-            try:
-                start_datetime = datetime.strptime(f"{start_year}-{start_month:02d}-{start_day:02d} {start_time}", "%Y-%m-%d %H:%M:%S")
-                end_datetime = datetime.strptime(f"{end_year}-{end_month:02d}-{end_day:02d} {end_time}", "%Y-%m-%d %H:%M:%S")
-                filtered_data = processed_data[
-                    (processed_data['datetime'] >= start_datetime) & 
-                    (processed_data['datetime'] <= end_datetime)
-                ]
-            except ValueError:
-                st.error("Invalid date combination. Please select valid year, month, day, and time.")
-                return
+            # The data is sorted by datetime, so its range is just the first and last rows
+            datetime_min = processed_data['datetime'].iloc[0]
+            datetime_max = processed_data['datetime'].iloc[-1]
+
+            # Batch the date and time inputs so the script reruns once on Apply, not per change
+            with st.form("datetime_filter"):
+                st.write("### Select Start Datetime")
+                start_date = st.date_input(
+                    "Start date",
+                    value=datetime_min.date(),
+                    min_value=datetime_min.date(),
+                    max_value=datetime_max.date(),
+                    key="start_date"
+                )
+                start_time = st.time_input("Start time", value=time(0, 0), step=300, key="start_time")
+
+                st.write("### Select End Datetime")
+                end_date = st.date_input(
+                    "End date",
+                    value=datetime_max.date(),
+                    min_value=datetime_min.date(),
+                    max_value=datetime_max.date(),
+                    key="end_date"
+                )
+                end_time = st.time_input("End time", value=time(23, 55), step=300, key="end_time")
 
-            st.write(f"Displaying data for datetime between {start_datetime} and {end_datetime}:")
-            st.write(filtered_data)
+                st.form_submit_button("Apply")
 
-            # Map visualization
-            plot_folium_map_with_geojson(filtered_data)
+            start_datetime = datetime.combine(start_date, start_time)
+            end_datetime = datetime.combine(end_date, end_time)
+            filtered_data = filter_by_datetime(processed_data, start_datetime, end_datetime)
+            is_empty = filtered_data.empty
+            if is_empty:
+                st.info(f"No data between {start_datetime} and {end_datetime}.")
+            else:
+                st.write(f"Displaying data for datetime between {start_datetime} and {end_datetime}:")
+                st.write(filtered_data)
+
+                # Map visualization
+                plot_folium_map_with_geojson(filtered_data)
 
             # Chart Visualizations
-            if processed_data is not None and not processed_data.empty:
-             st.sidebar.title("Chart Customization")
+            st.sidebar.title("Chart Customization")
 
             # Histogram Customization
             st.sidebar.subheader("Histogram Customization")
@@ -237,82 +508,33 @@ def historical_data():
             st.sidebar.subheader("3D Scatter Plot Customization")
             scatter_3d_color = st.sidebar.color_picker("Select 3D Scatter Plot Color", "#FFA15A")
 
+            # Nothing to chart; the sidebar above is still rendered so its values survive
+            if is_empty:
+                keep_unrendered_widget_state()
+                return
+
             # Advanced Data Visualizations
             st.subheader("Advanced Data Visualizations")
+            cols = filtered_data.columns.tolist()
+            tab_hist, tab_scatter, tab_line, tab_bar, tab_3d = st.tabs(
+                ["Histogram", "Scatter Plot", "Line Plot", "Bar Chart", "3D Scatter Plot"]
+            )
 
-            # Histogram
-            st.write("### Histogram")
-            if not filtered_data.empty:
-                column_to_plot = st.selectbox("Select Column for Histogram", options=filtered_data.columns, key="histogram")
-                fig_hist = px.histogram(filtered_data, x=column_to_plot, color_discrete_sequence=[hist_color], barmode=hist_barmode)
-                st.plotly_chart(fig_hist)
-
-            # Scatter Plot
-            st.write("### Scatter Plot")
-            if not filtered_data.empty:
-                x_scatter = st.selectbox("Select X-axis", options=filtered_data.columns, key="scatter_x")
-                y_scatter = st.selectbox("Select Y-axis", options=filtered_data.columns, key="scatter_y")
-                fig_scatter = px.scatter(filtered_data, x=x_scatter, y=y_scatter, color_discrete_sequence=[scatter_color])
-                fig_scatter.update_traces(marker=dict(size=scatter_size))
-                st.plotly_chart(fig_scatter)
-
-            # Line Plot
-            st.write("### Line Plot")
-            if not filtered_data.empty:
-                x_lineplot = st.selectbox("Select X-axis", options=filtered_data.columns, key="lineplot_x")
-                y_lineplot = st.selectbox("Select Y-axis", options=filtered_data.columns, key="lineplot_y")
-                fig_line = px.line(filtered_data, x=x_lineplot, y=y_lineplot, color_discrete_sequence=[line_color])
-                st.plotly_chart(fig_line)
-
-            # Bar Chart
-            st.write("### Bar Chart")
-            if not filtered_data.empty:
-                column_bar = st.selectbox("Select Column for Bar Chart", options=filtered_data.columns, key="bar")
-                fig_bar = px.bar(
-                    filtered_data,
-                    x=column_bar if bar_orientation == 'vertical' else filtered_data.columns[1],
-                    y=filtered_data.columns[1] if bar_orientation == 'vertical' else column_bar,
-                    color_discrete_sequence=[bar_color]
-                )
-                st.plotly_chart(fig_bar)
-
-                # 3D Scatter Plot
-                if 'region_id' in processed_data.columns and 'datetime' in processed_data.columns:
-                    st.write("### 3D Scatter Plot")
-
-                    # Detect traffic-related columns
-                    traffic_volume_columns = detect_traffic_volume_columns(processed_data)
-
-                    if not traffic_volume_columns:
-                        st.error("No suitable columns found for traffic volume. Please ensure the dataset includes relevant columns.")
-                    else:
-                        st.write(f"Detected traffic volume columns: {', '.join(traffic_volume_columns)}")
-
-                    # Ensure the datetime column is in datetime format
-                    processed_data['datetime'] = pd.to_datetime(processed_data['datetime'])
-
-                    for col in traffic_volume_columns:
-                        # Generate 3D scatter plot
-                        fig_3d = px.scatter_3d(
-                            processed_data,
-                            x=col,  # Use the detected traffic column for X-axis
-                            y='datetime',  # Use datetime column for Y-axis
-                            z='region_id',  # Region or other categorical data for Z-axis
-                            color_discrete_sequence=[scatter_3d_color]
-                        )
-
-                        # Update layout to ensure better datetime formatting
-                        fig_3d.update_layout(
-                            scene=dict(
-                                yaxis=dict(
-                                    title="Datetime",
-                                    tickformat="%b %Y",  # Display in "Month Year" format
-                                )
-                            )
-                        )
-
-                        # Display the plot
-                        st.plotly_chart(fig_3d)
+            with tab_hist:
+                show_histogram(filtered_data, cols, hist_color, hist_barmode)
+
+            with tab_scatter:
+                show_scatter(filtered_data, cols, scatter_color, scatter_size)
+
+            with tab_line:
+                show_line(filtered_data, cols, line_color)
+
+            with tab_bar:
+                show_bar(filtered_data, cols, bar_color, bar_orientation)
+
+            with tab_3d:
+                if 'region_id' in cols:
+                    show_scatter_3d(processed_data, scatter_3d_color)
 
 # Run the dashboard
 historical_data()
\ No newline at end of file